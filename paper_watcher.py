@@ -13,20 +13,35 @@ import os
 import re
 import time
 import json
+import queue
+import atexit
+import collections
+import platform
+import random
+import shutil
 import hashlib
-import requests
+import sqlite3
+import functools
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Optional, Dict, List, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, unquote
 
+# 全文链接扫描优先使用RE2（线性时间，无回溯），未安装时退回标准库re
 try:
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler, FileModifiedEvent
+    import re2 as re_engine
+except ImportError:
+    re_engine = re
+
+# 状态文件序列化优先使用orjson，未安装时退回标准库json
+try:
+    import orjson
 except ImportError:
-    print("请安装 watchdog: pip install watchdog")
-    exit(1)
+    orjson = None
 
 # ==================== 配置 ====================
 CONFIG = {
@@ -34,6 +49,10 @@ CONFIG = {
     "pdf_dir": "./papers/pdfs",        # PDF保存目录
     "state_file": ".paper_watcher_state.json",  # 状态文件
     "check_interval": 2,               # 检查间隔（秒）
+    "poll_interval": 2.0,              # 轮询模式下的扫描间隔（秒）
+    "debounce": 0.5,                   # 最后一次事件后等待多久再处理（秒）
+    "max_workers": 8,                  # 并发处理论文的线程数
+    "cache_file": ".paper_watcher_cache.db",    # 元数据缓存
     # 代理配置（Clash默认端口）
     "proxy": {
         "http": "http://127.0.0.1:7897",
@@ -50,7 +69,55 @@ def get_proxies():
         return CONFIG.get("proxy", {})
     return None
 
-@dataclass
+
+# ==================== 延迟导入 ====================
+# requests、lxml等较重的模块在首次使用时才导入，缩短 --once 等场景的启动时间
+
+@functools.lru_cache(maxsize=None)
+def _lazy_requests():
+    """导入requests"""
+    import requests
+    return requests
+
+
+@functools.lru_cache(maxsize=None)
+def _lazy_etree():
+    """导入XML解析器：优先使用lxml（C实现，直接解析bytes），未安装时退回标准库"""
+    try:
+        from lxml import etree
+    except ImportError:
+        import xml.etree.ElementTree as etree
+    return etree
+
+
+# 每个host复用一个Session，保持连接（keep-alive），避免重复TCP/TLS握手
+# 连接池大小需覆盖对同一host的最大并发请求数，否则多余的连接会被丢弃
+HTTP_POOL_MAXSIZE = 8
+_session_cache: Dict[str, "requests.Session"] = {}
+_session_lock = threading.Lock()
+
+
+def _session_for(url: str) -> "requests.Session":
+    """获取url所在host的共享Session"""
+    host = urlparse(url).netloc
+    with _session_lock:
+        session = _session_cache.get(host)
+        if session is None:
+            requests = _lazy_requests()
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            session = requests.Session()
+            # 重试由各API客户端自行处理
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_MAXSIZE,
+                                  max_retries=Retry(total=0))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session_cache[host] = session
+        return session
+
+
+@dataclass(slots=True)
 class PaperInfo:
     title: str
     authors: List[str]
@@ -60,6 +127,14 @@ class PaperInfo:
     doi: Optional[str] = None
     pdf_url: Optional[str] = None
     citations: Optional[int] = None
+    _formatted_authors: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def formatted_authors(self) -> str:
+        """默认格式的作者列表（首次访问时计算并缓存）"""
+        if self._formatted_authors is None:
+            self._formatted_authors = self.format_authors()
+        return self._formatted_authors
     
     def format_authors(self, max_authors: int = 3) -> str:
         """格式化作者列表"""
@@ -71,9 +146,6 @@ class PaperInfo:
         """生成Markdown格式的引用
         格式: 标题.作者.期刊/会议,年份 ([PDF](链接)) ([arXiv](链接)) (Citations: 数量)
         """
-        # 基本信息
-        result = f"**{self.title}**. {self.format_authors()}. {self.venue}, {self.year}"
-        
         # 链接部分
         links = []
         if local_pdf_path:
@@ -83,61 +155,262 @@ class PaperInfo:
         if self.doi:
             links.append(f"[DOI](https://doi.org/{self.doi})")
         
-        # 引用数
-        citation_str = f"Citations: {self.citations}" if self.citations is not None else "Citations: N/A"
-        
         # 组合：每个链接用括号包裹
-        if links:
-            result += " " + " ".join(f"({link})" for link in links)
-        result += f" ({citation_str})"
+        links_str = "".join(f" ({link})" for link in links)
+        citations = self.citations if self.citations is not None else "N/A"
         
-        return result
+        return (f"**{self.title}**. {self.formatted_authors}. {self.venue}, {self.year}"
+                f"{links_str} (Citations: {citations})")
 
 
 # ==================== URL解析器 ====================
 class URLParser:
     """解析论文URL，提取ID"""
     
-    # arXiv URL模式
-    ARXIV_PATTERNS = [
-        r'arxiv\.org/abs/(\d{4}\.\d{4,5}(?:v\d+)?)',
-        r'arxiv\.org/pdf/(\d{4}\.\d{4,5}(?:v\d+)?)',
-        r'arxiv\.org/abs/([a-z-]+/\d{7})',
-        r'arxiv\.org/pdf/([a-z-]+/\d{7})',
-    ]
+    # RE2的\s只匹配ASCII空白，显式列出Unicode空白（全角空格、NBSP等），
+    # 直接写入字符本身而非\u转义，两个引擎解析结果一致
+    _WS = "\\s\x0b\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
     
-    # DOI URL模式
-    DOI_PATTERNS = [
-        r'doi\.org/(10\.\d{4,}/[^\s\)]+)',
-        r'doi:\s*(10\.\d{4,}/[^\s\)]+)',
-    ]
+    # arXiv/DOI识别合并为一个正则，分组名即链接类型：
+    # arxiv_new: 新格式ID（不含版本号），arxiv_old: 旧格式ID，doi: DOI
+    _CLASSIFIER = re.compile(
+        r'arxiv\.org/(?:abs|pdf)/(?P<arxiv_new>\d{4}\.\d{4,5})(?:v\d+)?'
+        r'|arxiv\.org/(?:abs|pdf)/(?P<arxiv_old>[a-z-]+/\d{7})'
+        rf'|(?:doi\.org/|doi:[{_WS}]*)(?P<doi>10\.\d{{4,}}/[^{_WS}\)]+)',
+        re.IGNORECASE)
     
-    @classmethod
-    def extract_arxiv_id(cls, url: str) -> Optional[str]:
-        """从URL提取arXiv ID"""
-        for pattern in cls.ARXIV_PATTERNS:
-            match = re.search(pattern, url, re.IGNORECASE)
-            if match:
-                arxiv_id = match.group(1)
-                # 去除版本号用于比较
-                return arxiv_id.split('v')[0] if 'v' in arxiv_id else arxiv_id
-        return None
+    # 一次扫描同时提取URL和裸DOI，分组名即链接类型
+    _COMBINED = re_engine.compile(
+        rf'(?P<url>https?://[^{_WS}\)\]<>\"\']+)'
+        rf'|(?P<doi>doi:[{_WS}]*10\.\d{{4,}}/[^{_WS}\)\]<>\"\']+)')
     
-    @classmethod
-    def extract_doi(cls, url: str) -> Optional[str]:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def classify(url: str) -> Optional[Tuple[str, str]]:
+        """识别URL类型，返回 ("arxiv", ID) / ("doi", DOI) / None
+        结果缓存，重复保存时同一URL无需再次匹配
+        """
+        match = URLParser._CLASSIFIER.search(url)
+        if match is None:
+            return None
+        if match.lastgroup == "doi":
+            return ("doi", match.group("doi").rstrip('.'))
+        return ("arxiv", match.group(match.lastgroup))
+    
+    @staticmethod
+    def extract_arxiv_id(url: str) -> Optional[str]:
+        """从URL提取arXiv ID（不含版本号）"""
+        kind = URLParser.classify(url)
+        return kind[1] if kind and kind[0] == "arxiv" else None
+    
+    @staticmethod
+    def extract_doi(url: str) -> Optional[str]:
         """从URL提取DOI"""
-        for pattern in cls.DOI_PATTERNS:
-            match = re.search(pattern, url, re.IGNORECASE)
-            if match:
-                return match.group(1).rstrip('.')
-        return None
+        kind = URLParser.classify(url)
+        return kind[1] if kind and kind[0] == "doi" else None
     
     @classmethod
-    def find_urls_in_text(cls, text: str) -> List[str]:
-        """从文本中提取所有URL"""
-        url_pattern = r'https?://[^\s\)\]<>\"\']+|doi:\s*10\.\d{4,}/[^\s\)\]<>\"\'"]+'
-        urls = re.findall(url_pattern, text)
-        return [url.rstrip('.,;:') for url in urls]
+    def find_urls_in_text(cls, text: str) -> List[Tuple[str, str]]:
+        """从文本中提取所有链接
+        Returns: [(类型, 链接), ...]，类型为 "url" 或 "doi"
+        """
+        return [(match.lastgroup, match.group().rstrip('.,;:'))
+                for match in cls._COMBINED.finditer(text)]
+
+
+# RE2与标准库re对中文标点、全角空格、NBSP的切分须一致，否则退回re
+_ENGINE_SAMPLE = ("见 https://arxiv.org/abs/2301.00001\u3000（经典） "
+                  "https://arxiv.org/abs/2301.00002\xa0x "
+                  "doi:\u200310.1000/abc\u2003尾")
+if re_engine is not re:
+    _fallback = re.compile(URLParser._COMBINED.pattern)
+    if URLParser.find_urls_in_text(_ENGINE_SAMPLE) != [
+            (m.lastgroup, m.group().rstrip('.,;:'))
+            for m in _fallback.finditer(_ENGINE_SAMPLE)]:
+        URLParser._COMBINED = _fallback
+    del _fallback
+
+
+# ==================== 元数据缓存 ====================
+class MetadataCache:
+    """基于SQLite的元数据持久化缓存，热数据常驻内存"""
+    
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, ts REAL, data TEXT)")
+        self._conn.commit()
+        # 启动时把所有条目加载到内存
+        self._memory = {
+            key: {"ts": ts, "data": json.loads(data)}
+            for key, ts, data in self._conn.execute("SELECT key, ts, data FROM cache")
+        }
+    
+    def get(self, key: str, max_age_seconds: float):
+        """读取缓存，不存在或已过期时返回None"""
+        entry = self._memory.get(key)
+        if entry is None or time.time() - entry["ts"] > max_age_seconds:
+            return None
+        return entry["data"]
+    
+    def set(self, key: str, value):
+        """写入缓存"""
+        entry = {"ts": time.time(), "data": value}
+        with self._lock:
+            self._memory[key] = entry
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, ts, data) VALUES (?, ?, ?)",
+                (key, entry["ts"], json.dumps(value, ensure_ascii=False)))
+            self._conn.commit()
+
+
+# 全局缓存实例，由main()初始化；为None时不使用缓存
+METADATA_CACHE: Optional[MetadataCache] = None
+
+# 缓存有效期：元数据7天，引用数变化较快只缓存1天
+METADATA_TTL = 86400 * 7
+CITATIONS_TTL = 86400
+
+
+def cache_get(namespace: str, ttl: float, *args, **kwargs):
+    """按命名空间和参数读取缓存"""
+    if METADATA_CACHE is None:
+        return None
+    key = f"{namespace}:{json.dumps([args, kwargs], sort_keys=True)}"
+    cached = METADATA_CACHE.get(key, ttl)
+    if isinstance(cached, dict) and "paper" in cached:
+        paper_info = PaperInfo(**cached["paper"])
+        # 引用数按自己的有效期单独缓存，过期时为None，由调用方重新获取
+        if paper_info.arxiv_id:
+            paper_info.citations = cache_get(
+                "s2_citations", CITATIONS_TTL, arxiv_id=paper_info.arxiv_id)
+        return paper_info
+    return cached
+
+
+def cache_set(namespace: str, value, *args, **kwargs):
+    """按命名空间和参数写入缓存，None不缓存"""
+    if METADATA_CACHE is None or value is None:
+        return
+    key = f"{namespace}:{json.dumps([args, kwargs], sort_keys=True)}"
+    if isinstance(value, PaperInfo):
+        # 引用数变化较快，不随元数据缓存，改存到有效期更短的s2_citations
+        if value.citations is not None and value.arxiv_id:
+            cache_set("s2_citations", value.citations, arxiv_id=value.arxiv_id)
+        paper = {f.name: getattr(value, f.name) for f in fields(value) if f.init}
+        paper["citations"] = None
+        value = {"paper": paper}
+    METADATA_CACHE.set(key, value)
+
+
+def cache_wrap(namespace: str, ttl: float):
+    """缓存API结果的装饰器（用于classmethod，缓存键不含cls）"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(cls, *args, **kwargs):
+            cached = cache_get(namespace, ttl, *args, **kwargs)
+            if cached is not None:
+                return cached
+            result = func(cls, *args, **kwargs)
+            cache_set(namespace, result, *args, **kwargs)
+            return result
+        return wrapper
+    return decorator
+
+
+# ==================== 限速 ====================
+class TokenBucket:
+    """令牌桶限速器：每次请求前获取一个令牌，线程安全"""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate      # 每秒生成的令牌数
+        self.burst = burst    # 桶容量
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """获取一个令牌，令牌不足时阻塞等待"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # 先预占令牌，再在锁外等待，保证多线程按顺序排队
+            self._tokens -= 1
+            wait_time = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+# Semantic Scholar未认证限额约1次/秒，arXiv建议每3秒1次
+S2_BUCKET = TokenBucket(rate=1.0, burst=1)
+ARXIV_BUCKET = TokenBucket(rate=0.33, burst=1)
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时抛出，调用方应直接使用备用数据源"""
+
+
+class CircuitBreaker:
+    """熔断器：窗口内连续失败过多时，在冷却期内直接拒绝请求
+    CLOSED(正常) -> OPEN(拒绝请求) -> HALF_OPEN(放行一个试探请求) -> CLOSED/OPEN
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 60,
+                 window: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after    # 打开后多久允许试探（秒）
+        self.window = window              # 统计失败次数的时间窗口（秒）
+        self.state = self.CLOSED
+        self._failures = collections.deque()
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def is_open(self) -> bool:
+        """是否拒绝本次请求；冷却期结束后只放行一个试探请求"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_after:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return True
+                self._trial_in_flight = True
+                return False
+            return self.state == self.OPEN
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures.clear()
+    
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self._open(now)
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window:
+                self._failures.popleft()
+            if len(self._failures) >= self.failure_threshold:
+                self._open(now)
+    
+    def _open(self, now: float):
+        if self.state != self.OPEN:
+            print(f"  [警告] 服务连续失败，暂停请求 {self.reset_after} 秒")
+        self.state = self.OPEN
+        self._opened_at = now
+        self._failures.clear()
+
+
+S2_BREAKER = CircuitBreaker(failure_threshold=5, reset_after=60)
 
 
 # ==================== API客户端 ====================
@@ -146,42 +419,52 @@ class ArxivAPI:
     
     BASE_URL = "https://export.arxiv.org/api/query"
     
+    # Atom命名空间（Clark表示法，避免每次查找时解析前缀）
+    _ATOM = "{http://www.w3.org/2005/Atom}"
+    
+    # 限制同时访问arXiv的请求数
+    _semaphore = threading.Semaphore(5)
+    
     @classmethod
+    @cache_wrap("arxiv", ttl=METADATA_TTL)
     def get_paper_info(cls, arxiv_id: str) -> Optional[PaperInfo]:
         """通过arXiv ID获取论文信息"""
+        requests = _lazy_requests()
         try:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             params = {"id_list": arxiv_id}
-            response = requests.get(cls.BASE_URL, params=params, headers=headers, 
-                                    proxies=get_proxies(), timeout=30)
+            ARXIV_BUCKET.acquire()
+            with cls._semaphore:
+                response = _session_for(cls.BASE_URL).get(cls.BASE_URL, params=params,
+                                                          headers=headers, proxies=get_proxies(),
+                                                          timeout=30)
             response.raise_for_status()
             
-            # 解析XML响应
-            import xml.etree.ElementTree as ET
-            root = ET.fromstring(response.text)
+            # 解析XML响应（直接解析bytes，省去解码）
+            root = _lazy_etree().fromstring(response.content)
             
-            ns = {'atom': 'http://www.w3.org/2005/Atom'}
-            entry = root.find('atom:entry', ns)
+            atom = cls._ATOM
+            entry = root.find(f'{atom}entry')
             
             if entry is None:
                 return None
             
-            title = entry.find('atom:title', ns)
+            title = entry.find(f'{atom}title')
             title_text = title.text.strip().replace('\n', ' ') if title is not None else "Unknown"
             
             authors = []
-            for author in entry.findall('atom:author', ns):
-                name = author.find('atom:name', ns)
+            for author in entry.iterfind(f'{atom}author'):
+                name = author.find(f'{atom}name')
                 if name is not None:
                     authors.append(name.text)
             
-            published = entry.find('atom:published', ns)
+            published = entry.find(f'{atom}published')
             year = published.text[:4] if published is not None else "Unknown"
             
             # 获取分类作为venue
-            categories = entry.findall('atom:category', ns)
+            categories = entry.findall(f'{atom}category')
             primary_category = categories[0].get('term') if categories else "arXiv"
             
             # PDF链接
@@ -208,36 +491,96 @@ class ArxivAPI:
     @classmethod
     def _fallback_semantic_scholar(cls, arxiv_id: str) -> Optional[PaperInfo]:
         """使用Semantic Scholar作为备用"""
-        return SemanticScholarAPI.get_full_paper_info(arxiv_id)
+        try:
+            return SemanticScholarAPI.get_full_paper_info(arxiv_id)
+        except CircuitOpenError:
+            return None
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(int(value)))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
 
 class SemanticScholarAPI:
     """Semantic Scholar API客户端 - 用于获取论文信息和引用数"""
     
     BASE_URL = "https://api.semanticscholar.org/graph/v1/paper"
+    FULL_FIELDS = "title,authors,year,venue,citationCount,externalIds,publicationVenue"
+    
+    # batch接口单次最多查询的论文数
+    BATCH_SIZE = 500
+    
+    # 限速等待的总时长上限（秒）
+    MAX_RETRY_WAIT = 60
+    
+    # 限制同时访问Semantic Scholar的请求数
+    _semaphore = threading.Semaphore(5)
     
     @classmethod
-    def _request_with_retry(cls, url: str, params: dict, max_retries: int = 3) -> Optional[dict]:
-        """带重试机制的请求"""
+    def _request_with_retry(cls, url: str, params: dict, max_retries: int = 3,
+                            json_body: Optional[dict] = None):
+        """带重试机制的请求（提供json_body时使用POST）
+        Semantic Scholar熔断期间抛出CircuitOpenError
+        """
         headers = {'User-Agent': 'Mozilla/5.0'}
+        total_wait = 0.0
         
         for attempt in range(max_retries):
+            if S2_BREAKER.is_open():
+                raise CircuitOpenError("Semantic Scholar暂时不可用")
             try:
-                response = requests.get(url, params=params, headers=headers,
-                                        proxies=get_proxies(), timeout=30)
+                S2_BUCKET.acquire()
+                with cls._semaphore:
+                    session = _session_for(url)
+                    if json_body is not None:
+                        response = session.post(url, params=params, json=json_body,
+                                                headers=headers, proxies=get_proxies(),
+                                                timeout=30)
+                    else:
+                        response = session.get(url, params=params, headers=headers,
+                                               proxies=get_proxies(), timeout=30)
+                
+                if response.status_code == 429 or response.status_code >= 500:
+                    S2_BREAKER.record_failure()
+                else:
+                    S2_BREAKER.record_success()
                 
                 if response.status_code == 200:
                     return response.json()
                 elif response.status_code == 429:
-                    # 被限速，等待后重试
-                    wait_time = (attempt + 1) * 3  # 3秒, 6秒, 9秒
-                    print(f"  [警告] API限速，等待 {wait_time} 秒后重试...")
+                    # 被限速：优先遵循Retry-After，否则指数退避加随机抖动
+                    wait_time = _parse_retry_after(response.headers.get("Retry-After"))
+                    if wait_time is None:
+                        wait_time = 2 ** attempt + random.uniform(0, 1)
+                    if attempt == max_retries - 1:
+                        print(f"  [警告] API限速，已达重试次数上限")
+                        return None
+                    # 提前重试只会再次被限速，超出剩余等待额度时直接放弃
+                    if wait_time > cls.MAX_RETRY_WAIT - total_wait:
+                        print(f"  [警告] API限速，需等待 {wait_time:.1f} 秒，超出等待上限")
+                        return None
+                    total_wait += wait_time
+                    print(f"  [警告] API限速，等待 {wait_time:.1f} 秒后重试...")
                     time.sleep(wait_time)
                     continue
                 else:
                     print(f"  [警告] API返回: {response.status_code}")
                     return None
             except Exception as e:
+                S2_BREAKER.record_failure()
                 print(f"  [警告] 请求失败: {e}")
                 if attempt < max_retries - 1:
                     time.sleep(2)
@@ -245,6 +588,7 @@ class SemanticScholarAPI:
         return None
     
     @classmethod
+    @cache_wrap("s2_citations", ttl=CITATIONS_TTL)
     def get_citations(cls, arxiv_id: str = None, doi: str = None) -> Optional[int]:
         """获取论文引用数"""
         if arxiv_id:
@@ -263,15 +607,51 @@ class SemanticScholarAPI:
         return None
     
     @classmethod
+    @cache_wrap("s2_full", ttl=METADATA_TTL)
     def get_full_paper_info(cls, arxiv_id: str) -> Optional[PaperInfo]:
         """通过arXiv ID获取完整论文信息"""
         url = f"{cls.BASE_URL}/arXiv:{arxiv_id}"
-        params = {"fields": "title,authors,year,venue,citationCount,externalIds,publicationVenue"}
+        params = {"fields": cls.FULL_FIELDS}
         
         data = cls._request_with_retry(url, params)
         if not data:
             return None
+        return cls._parse_paper(data, arxiv_id)
+    
+    @classmethod
+    def get_batch(cls, arxiv_ids: List[str]) -> Dict[str, PaperInfo]:
+        """通过batch接口一次获取多篇论文信息，返回 {arXiv ID: PaperInfo}"""
+        results = {}
+        missing = []
+        for arxiv_id in dict.fromkeys(arxiv_ids):
+            cached = cache_get("s2_full", METADATA_TTL, arxiv_id)
+            if cached is not None:
+                results[arxiv_id] = cached
+            else:
+                missing.append(arxiv_id)
         
+        url = f"{cls.BASE_URL}/batch"
+        params = {"fields": cls.FULL_FIELDS}
+        for i in range(0, len(missing), cls.BATCH_SIZE):
+            chunk = missing[i:i + cls.BATCH_SIZE]
+            try:
+                data = cls._request_with_retry(
+                    url, params, json_body={"ids": [f"arXiv:{a}" for a in chunk]})
+            except CircuitOpenError:
+                break
+            if not data:
+                continue
+            # 返回列表与请求顺序一致，未找到的论文为null
+            for arxiv_id, item in zip(chunk, data):
+                if item:
+                    paper_info = cls._parse_paper(item, arxiv_id)
+                    cache_set("s2_full", paper_info, arxiv_id)
+                    results[arxiv_id] = paper_info
+        return results
+    
+    @classmethod
+    def _parse_paper(cls, data: dict, arxiv_id: str) -> PaperInfo:
+        """将API返回的数据转换为PaperInfo"""
         authors = [a.get('name', 'Unknown') for a in data.get('authors', [])]
         
         # 获取venue信息
@@ -294,32 +674,182 @@ class SemanticScholarAPI:
 
 
 # ==================== PDF下载器 ====================
+class RangeNotSupportedError(IOError):
+    """服务器对Range请求返回了完整内容"""
+
+
 class PDFDownloader:
     """PDF下载器"""
     
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    # 写入文件时的拷贝缓冲区大小
+    COPY_BUFFER = 1 << 20
+    
+    # 超过该大小且服务器支持Range时，分段并发下载
+    PARALLEL_THRESHOLD = 1 << 20
+    PARALLEL_PARTS = 4
+    
+    # 同一host同时下载的PDF数，保证并发连接数不超过连接池大小
+    MAX_DOWNLOADS_PER_HOST = max(1, HTTP_POOL_MAXSIZE // PARALLEL_PARTS)
+    _host_semaphores: Dict[str, threading.Semaphore] = {}
+    _host_lock = threading.Lock()
+    
+    @classmethod
+    def _semaphore_for(cls, url: str) -> threading.Semaphore:
+        """获取url所在host的下载并发限制"""
+        host = urlparse(url).netloc
+        with cls._host_lock:
+            semaphore = cls._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.Semaphore(cls.MAX_DOWNLOADS_PER_HOST)
+                cls._host_semaphores[host] = semaphore
+            return semaphore
+    
+    @staticmethod
+    def _is_arxiv(url: str) -> bool:
+        return urlparse(url).netloc.endswith('arxiv.org')
+    
+    @classmethod
+    def _throttle(cls, url: str):
+        """arXiv的PDF同样遵守arXiv的访问频率限制，每个请求（含HEAD）各取一个令牌"""
+        if cls._is_arxiv(url):
+            ARXIV_BUCKET.acquire()
+    
     @classmethod
     def download(cls, url: str, save_path: str) -> bool:
-        """下载PDF文件"""
+        """下载PDF文件
+        单线程下载写入 .part 文件，中断后可断点续传；
+        分段并发下载写入 .tmp 文件，中断后重新下载
+        """
+        part_path = save_path + '.part'
+        tmp_path = save_path + '.tmp'
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, proxies=get_proxies(), 
-                                    timeout=60, stream=True)
-            response.raise_for_status()
-            
-            # 确保目录存在
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
+            with cls._semaphore_for(url):
+                cls._download(url, save_path, part_path, tmp_path)
             return True
         except Exception as e:
-            print(f"  [错误] 下载PDF失败: {e}")
+            print(f"  [错误] 下载PDF失败 ({os.path.basename(save_path)}): {e}")
             return False
     
+    @classmethod
+    def _download(cls, url: str, save_path: str, part_path: str, tmp_path: str):
+        """选择分段并发或单线程方式下载"""
+        url, size, validator = cls._probe(url)
+        
+        # arXiv限速下分段并发无收益，只走单线程下载
+        if (validator and size > cls.PARALLEL_THRESHOLD and not cls._is_arxiv(url)
+                and not os.path.exists(part_path)):
+            try:
+                cls._download_parallel(url, tmp_path, size, validator)
+                os.replace(tmp_path, save_path)
+                return
+            except RangeNotSupportedError:
+                # 服务器实际不支持分段，改为单线程下载
+                os.remove(tmp_path)
+                validator = None
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        
+        cls._download_stream(url, part_path, size, validator)
+        os.replace(part_path, save_path)
+    
+    @classmethod
+    def _probe(cls, url: str) -> Tuple[str, int, Optional[str]]:
+        """HEAD请求获取 (最终URL, 文件大小, 校验值)
+        校验值为ETag或Last-Modified，仅在服务器支持Range时返回，用于If-Range
+        """
+        requests = _lazy_requests()
+        cls._throttle(url)
+        try:
+            response = _session_for(url).head(url, headers=cls.HEADERS, proxies=get_proxies(),
+                                              timeout=30, allow_redirects=True)
+        except requests.exceptions.RequestException:
+            return url, 0, None
+        if not response.ok:
+            return url, 0, None
+        
+        size = int(response.headers.get('Content-Length') or 0)
+        validator = None
+        if response.headers.get('Accept-Ranges', '').lower() == 'bytes':
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        return response.url or url, size, validator
+    
+    @classmethod
+    def _download_stream(cls, url: str, part_path: str, size: int,
+                         validator: Optional[str]):
+        """单线程下载，已有 .part 文件且服务器支持Range时从断点继续"""
+        offset = os.path.getsize(part_path) if validator and os.path.exists(part_path) else 0
+        if size and offset > size:
+            # .part比远端文件还大，说明已失效，重新下载
+            os.remove(part_path)
+            offset = 0
+        if offset and offset == size:
+            return
+        
+        headers = dict(cls.HEADERS)
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = validator
+        cls._throttle(url)
+        response = _session_for(url).get(url, headers=headers, proxies=get_proxies(),
+                                         timeout=60, stream=True)
+        if offset and response.status_code == 416:
+            # 断点超出文件范围，丢弃 .part 后完整下载
+            response.close()
+            os.remove(part_path)
+            return cls._download_stream(url, part_path, size, None)
+        response.raise_for_status()
+        
+        # 206表示从断点续传；200表示文件已变化，服务器返回了完整内容
+        mode = 'ab' if offset and response.status_code == 206 else 'wb'
+        with open(part_path, mode) as f:
+            cls._write_body(response, f)
+    
+    @classmethod
+    def _download_parallel(cls, url: str, tmp_path: str, size: int, validator: str):
+        """按Range分段并发下载，各段写入预分配文件的对应位置
+        各段带If-Range，文件在下载期间变化时服务器返回200，改为单线程下载
+        """
+        with open(tmp_path, 'wb') as f:
+            f.truncate(size)
+        
+        step = -(-size // cls.PARALLEL_PARTS)
+        ranges = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+        
+        def fetch_range(byte_range: Tuple[int, int]):
+            start, end = byte_range
+            headers = dict(cls.HEADERS, Range=f'bytes={start}-{end}')
+            headers['If-Range'] = validator
+            response = _session_for(url).get(url, headers=headers, proxies=get_proxies(),
+                                             timeout=60, stream=True)
+            response.raise_for_status()
+            if response.status_code != 206:
+                response.close()
+                raise RangeNotSupportedError(f"服务器未返回分段内容: {response.status_code}")
+            
+            with open(tmp_path, 'r+b') as f:
+                f.seek(start)
+                cls._write_body(response, f)
+                written = f.tell() - start
+            if written != end - start + 1:
+                raise IOError(f"分段下载不完整: {start}-{end}")
+        
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            list(executor.map(fetch_range, ranges))
+    
+    @classmethod
+    def _write_body(cls, response, f):
+        """将响应体写入文件：直接从原始流大块拷贝，避免逐块Python循环"""
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        # 让urllib3处理gzip等传输编码
+        response.raw.decode_content = True
+        shutil.copyfileobj(response.raw, f, length=cls.COPY_BUFFER)
+    
     @classmethod
     def generate_filename(cls, paper_info: PaperInfo) -> str:
         """生成安全的文件名"""
@@ -337,21 +867,40 @@ class StateManager:
     def __init__(self, state_file: str):
         self.state_file = state_file
         self.state = self._load_state()
+        self.state.setdefault("file_urls", {})
+        # 延迟写入：修改只标记为脏，由maybe_flush批量落盘
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        atexit.register(self.maybe_flush, force=True)
     
     def _load_state(self) -> Dict:
         """加载状态文件"""
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    data = f.read()
+                return orjson.loads(data) if orjson else json.loads(data)
             except:
                 pass
-        return {"processed_urls": {}, "file_hashes": {}}
+        return {"processed_urls": {}, "file_hashes": {}, "file_urls": {}}
     
     def save_state(self):
         """保存状态"""
-        with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        if orjson:
+            data = orjson.dumps(self.state, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(self.state, indent=2, ensure_ascii=False).encode('utf-8')
+        with open(self.state_file, 'wb') as f:
+            f.write(data)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+    
+    def maybe_flush(self, min_interval: float = 2.0, force: bool = False):
+        """有未保存的修改且距上次保存超过min_interval秒时写入状态文件"""
+        if not self._dirty:
+            return
+        if force or time.monotonic() - self._last_flush >= min_interval:
+            self.save_state()
     
     def is_url_processed(self, url: str) -> bool:
         """检查URL是否已处理"""
@@ -363,23 +912,53 @@ class StateManager:
             "processed_at": datetime.now().isoformat(),
             "info": paper_info
         }
-        self.save_state()
+        self._dirty = True
+    
+    def get_file_urls(self, filepath: str) -> set:
+        """获取上次处理时文件中的链接集合"""
+        return set(self.state["file_urls"].get(filepath, []))
+    
+    def update_file_urls(self, filepath: str, urls):
+        """记录文件中已处理过的链接"""
+        self.state["file_urls"][filepath] = sorted(urls)
+        self._dirty = True
+    
+    def get_file_fingerprint(self, filepath: str) -> Tuple[int, int]:
+        """获取文件指纹 (修改时间ns, 大小)，只需一次stat调用"""
+        st = os.stat(filepath)
+        return (st.st_mtime_ns, st.st_size)
     
     def get_file_hash(self, filepath: str) -> str:
         """获取文件内容hash"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return hashlib.md5(f.read().encode()).hexdigest()
+        h = hashlib.blake2b(digest_size=16)
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return h.hexdigest()
     
     def has_file_changed(self, filepath: str) -> bool:
-        """检查文件是否有变化"""
-        current_hash = self.get_file_hash(filepath)
-        old_hash = self.state["file_hashes"].get(filepath)
-        return current_hash != old_hash
+        """检查文件是否有变化
+        指纹一致则视为未变化；指纹不同时再比较内容hash，排除只改了mtime的情况
+        """
+        old = self.state["file_hashes"].get(filepath)
+        if not isinstance(old, dict):
+            return True
+        if list(self.get_file_fingerprint(filepath)) == old.get("fingerprint"):
+            return False
+        return self.get_file_hash(filepath) != old.get("digest")
+    
+    def forget_file_hash(self, filepath: str):
+        """清除文件hash，使下次检查时视为已变化"""
+        if self.state["file_hashes"].pop(filepath, None) is not None:
+            self._dirty = True
     
     def update_file_hash(self, filepath: str):
-        """更新文件hash"""
-        self.state["file_hashes"][filepath] = self.get_file_hash(filepath)
-        self.save_state()
+        """更新文件指纹和hash"""
+        self.state["file_hashes"][filepath] = {
+            "fingerprint": list(self.get_file_fingerprint(filepath)),
+            "digest": self.get_file_hash(filepath)
+        }
+        self._dirty = True
 
 
 # ==================== Markdown处理器 ====================
@@ -389,51 +968,46 @@ class MarkdownProcessor:
     def __init__(self, state_manager: StateManager, pdf_dir: str):
         self.state = state_manager
         self.pdf_dir = pdf_dir
+        # PDF目录只需创建一次，下载时不再检查
+        os.makedirs(pdf_dir, exist_ok=True)
+        # 仍有链接处理失败的文件，不记录其hash，保存或重启后会重试
+        self.unresolved_files = set()
+        # {文件路径: process_file扫描时的文件内容}，用于判断处理期间文件是否又被修改
+        self.scanned_content: Dict[str, str] = {}
     
     def process_file(self, filepath: str) -> List[Tuple[str, PaperInfo, str]]:
         """
         处理Markdown文件，返回新处理的论文列表
         Returns: [(原始URL, PaperInfo, 本地PDF路径), ...]
         """
-        results = []
-        
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
+        self.scanned_content[filepath] = content
         
         # 提取所有URL
         urls = URLParser.find_urls_in_text(content)
         
-        for url in urls:
+        # 上次已见过的链接；其中的论文链接仍以processed_urls为准（删除记录即可重新处理）
+        known_urls = self.state.get_file_urls(filepath)
+        
+        # 第一阶段：收集所有新的arXiv链接，按ID分组（同一论文的abs/pdf链接只处理一次）
+        new_items: Dict[str, List[str]] = {}
+        seen = set()
+        for kind, url in urls:
+            if url in seen:
+                continue
+            seen.add(url)
             if self.state.is_url_processed(url):
                 continue
+            if url in known_urls and URLParser.classify(url) is None:
+                continue
             
             print(f"\n  发现新链接: {url}")
             
-            # 尝试解析arXiv ID
-            arxiv_id = URLParser.extract_arxiv_id(url)
+            # 尝试解析arXiv ID（裸DOI不可能是arXiv链接）
+            arxiv_id = URLParser.extract_arxiv_id(url) if kind == "url" else None
             if arxiv_id:
-                paper_info = self._process_arxiv(arxiv_id)
-                if paper_info:
-                    # 下载PDF
-                    pdf_filename = PDFDownloader.generate_filename(paper_info)
-                    pdf_path = os.path.join(self.pdf_dir, pdf_filename)
-                    
-                    if PDFDownloader.download(paper_info.pdf_url, pdf_path):
-                        print(f"  ✓ PDF已下载: {pdf_filename}")
-                        relative_pdf_path = os.path.relpath(pdf_path, os.path.dirname(filepath))
-                    else:
-                        relative_pdf_path = None
-                    
-                    results.append((url, paper_info, relative_pdf_path))
-                    
-                    # 标记为已处理
-                    self.state.mark_url_processed(url, {
-                        "title": paper_info.title,
-                        "arxiv_id": arxiv_id
-                    })
-                    
-                    # 处理多个链接时添加延迟，避免API限速
-                    time.sleep(2)
+                new_items.setdefault(arxiv_id, []).append(url)
                 continue
             
             # 尝试解析DOI (基础支持)
@@ -442,101 +1016,216 @@ class MarkdownProcessor:
                 print(f"  [信息] 检测到DOI: {doi}，暂时仅支持arXiv链接的完整处理")
                 self.state.mark_url_processed(url, {"doi": doi})
         
+        if not new_items:
+            self.state.update_file_urls(filepath, {url for _, url in urls})
+            self.unresolved_files.discard(filepath)
+            return []
+        
+        # 第二阶段：通过batch接口一次获取所有元数据
+        print(f"\n  正在批量获取 {len(new_items)} 篇论文信息...")
+        prefetched = SemanticScholarAPI.get_batch(list(new_items))
+        
+        # 第三阶段：并发下载PDF（batch未命中的论文逐篇获取）
+        max_workers = min(CONFIG.get("max_workers", 8), len(new_items))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = list(executor.map(
+                lambda arxiv_id: self._fetch_and_download(
+                    filepath, arxiv_id, prefetched.get(arxiv_id)),
+                new_items))
+        
+        results = []
+        failed = set()
+        for (arxiv_id, id_urls), result in zip(new_items.items(), fetched):
+            if result is None:
+                failed.update(id_urls)
+                continue
+            
+            paper_info, relative_pdf_path = result
+            for url in id_urls:
+                results.append((url, paper_info, relative_pdf_path))
+                # 标记为已处理
+                self.state.mark_url_processed(url, {
+                    "title": paper_info.title,
+                    "arxiv_id": arxiv_id
+                })
+        
+        # 处理失败的链接不记录，下次文件变化时重试
+        self.state.update_file_urls(filepath, {url for _, url in urls} - failed)
+        if failed:
+            self.unresolved_files.add(filepath)
+        else:
+            self.unresolved_files.discard(filepath)
         return results
     
-    def _process_arxiv(self, arxiv_id: str) -> Optional[PaperInfo]:
-        """处理arXiv论文 - 优先使用Semantic Scholar API"""
-        print(f"  正在获取论文信息: {arxiv_id}")
+    def _fetch_and_download(self, filepath: str, arxiv_id: str,
+                            paper_info: Optional[PaperInfo] = None
+                            ) -> Optional[Tuple[PaperInfo, str]]:
+        """获取单篇论文信息并下载PDF（在工作线程中执行）
+        Returns: (PaperInfo, 本地PDF路径)
+        """
+        paper_info = self._process_arxiv(arxiv_id, paper_info)
+        if not paper_info:
+            return None
+        
+        # 下载PDF
+        pdf_filename = PDFDownloader.generate_filename(paper_info)
+        pdf_path = os.path.join(self.pdf_dir, pdf_filename)
+        
+        if PDFDownloader.download(paper_info.pdf_url, pdf_path):
+            print(f"  [{arxiv_id}] ✓ PDF已下载: {pdf_filename}")
+            relative_pdf_path = os.path.relpath(pdf_path, os.path.dirname(filepath))
+        else:
+            relative_pdf_path = None
+        
+        return (paper_info, relative_pdf_path)
+    
+    def _process_arxiv(self, arxiv_id: str,
+                       paper_info: Optional[PaperInfo] = None) -> Optional[PaperInfo]:
+        """处理arXiv论文 - 优先使用Semantic Scholar API
+        paper_info: 批量接口已获取的信息，为None时单独请求
+        """
+        # 多个论文并发处理，每行输出带上arXiv ID以便区分
+        print(f"  [{arxiv_id}] 正在获取论文信息")
         
         # 优先使用Semantic Scholar（更稳定，且包含引用数）
-        paper_info = SemanticScholarAPI.get_full_paper_info(arxiv_id)
+        if paper_info is None:
+            try:
+                paper_info = SemanticScholarAPI.get_full_paper_info(arxiv_id)
+            except CircuitOpenError:
+                print(f"  [{arxiv_id}] [信息] Semantic Scholar暂时不可用")
         
         # 如果Semantic Scholar失败，尝试arXiv API
         if not paper_info:
-            print(f"  [信息] 尝试使用arXiv API...")
+            print(f"  [{arxiv_id}] [信息] 尝试使用arXiv API...")
             paper_info = ArxivAPI.get_paper_info(arxiv_id)
         
         if not paper_info:
-            print(f"  [错误] 无法获取论文信息")
+            print(f"  [{arxiv_id}] [错误] 无法获取论文信息")
             return None
         
-        print(f"  ✓ 标题: {paper_info.title[:60]}...")
-        print(f"  ✓ 作者: {paper_info.format_authors()}")
+        print(f"  [{arxiv_id}] ✓ 标题: {paper_info.title[:60]}...")
+        print(f"  [{arxiv_id}] ✓ 作者: {paper_info.formatted_authors}")
         
-        # 如果引用数还没有，单独获取（加延迟避免限速）
+        # 如果引用数还没有，单独获取
         if paper_info.citations is None:
-            print(f"  正在获取引用数...")
-            time.sleep(1)  # 避免连续请求被限速
-            citations = SemanticScholarAPI.get_citations(arxiv_id=arxiv_id)
+            print(f"  [{arxiv_id}] 正在获取引用数...")
+            try:
+                citations = SemanticScholarAPI.get_citations(arxiv_id=arxiv_id)
+            except CircuitOpenError:
+                citations = None
             if citations is not None:
                 paper_info.citations = citations
         
         if paper_info.citations is not None:
-            print(f"  ✓ 引用数: {paper_info.citations}")
+            print(f"  [{arxiv_id}] ✓ 引用数: {paper_info.citations}")
         else:
-            print(f"  [警告] 无法获取引用数")
+            print(f"  [{arxiv_id}] [警告] 无法获取引用数")
         
         return paper_info
     
     def update_file_with_formatted_refs(self, filepath: str, 
-                                        results: List[Tuple[str, PaperInfo, str]]):
-        """更新文件，在原始URL后面追加格式化的引用信息"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+                                        results: List[Tuple[str, PaperInfo, str]]) -> str:
+        """更新文件，在原始URL后面追加格式化的引用信息
+        Returns: 更新前的文件内容
+        """
+        # URL -> 格式化引用，单次遍历所有行
+        formatted = {url: paper_info.to_markdown(pdf_path)
+                     for url, paper_info, pdf_path in results}
         
-        for url, paper_info, pdf_path in results:
-            formatted = paper_info.to_markdown(pdf_path)
+        with open(filepath, 'r+', encoding='utf-8') as f:
+            content = f.read()
             
-            # 在URL后面追加格式化信息
-            # 使用字符串替换而非正则，避免特殊字符问题
-            # 查找独立的URL行（URL单独一行）
-            lines = content.split('\n')
+            # 查找独立的URL行（URL单独一行，去除首尾空白后匹配）
             new_lines = []
-            for line in lines:
+            for line in content.split('\n'):
                 new_lines.append(line)
-                # 如果这一行就是URL（去除首尾空白后匹配）
-                if line.strip() == url:
+                suffix = formatted.get(line.strip())
+                if suffix is not None:
                     new_lines.append('')  # 空行
-                    new_lines.append(formatted)
-            content = '\n'.join(new_lines)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+                    new_lines.append(suffix)
+            
+            f.seek(0)
+            f.write('\n'.join(new_lines))
+            f.truncate()
         
         print(f"  ✓ 已更新文件: {filepath}")
+        return content
 
 
 # ==================== 文件监控 ====================
-class PaperWatcherHandler(FileSystemEventHandler):
+class PaperWatcherHandler:
     """文件变化处理器"""
     
     def __init__(self, processor: MarkdownProcessor, state: StateManager):
         self.processor = processor
         self.state = state
-        self.pending_files = set()
-        self.last_event_time = {}
+        # 防抖：{文件路径: 截止时间}，截止前的新事件会推迟截止时间
+        self.pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # 事件到达时唤醒主循环，避免空转
+        self.wakeup = queue.Queue(maxsize=1024)
     
     def on_modified(self, event):
-        if event.is_directory:
-            return
+        # 编辑器一次保存可能触发多个事件，合并为一次处理
+        with self._lock:
+            self.pending[event.src_path] = time.monotonic() + CONFIG["debounce"]
+        try:
+            self.wakeup.put_nowait(event.src_path)
+        except queue.Full:
+            pass
+    
+    def event_handler(self):
+        """构造只接收 .md 文件事件的watchdog处理器（此时才导入watchdog）"""
+        from watchdog.events import PatternMatchingEventHandler
         
-        if not event.src_path.endswith('.md'):
-            return
+        watcher = self
         
-        # 防抖：同一文件2秒内只处理一次
-        current_time = time.time()
-        last_time = self.last_event_time.get(event.src_path, 0)
-        if current_time - last_time < 2:
-            return
+        class _MarkdownEventHandler(PatternMatchingEventHandler):
+            def __init__(self):
+                super().__init__(patterns=["*.md"], ignore_directories=True)
+            
+            def on_modified(self, event):
+                watcher.on_modified(event)
+            
+            # 写入完成后关闭文件（IN_CLOSE_WRITE）同样视为修改
+            def on_closed(self, event):
+                watcher.on_modified(event)
         
-        self.last_event_time[event.src_path] = current_time
-        self.pending_files.add(event.src_path)
+        return _MarkdownEventHandler()
+    
+    def wait_for_events(self, timeout: float):
+        """阻塞等待文件事件，超时、收到事件或有文件到期后返回"""
+        with self._lock:
+            if self.pending:
+                next_deadline = min(self.pending.values())
+                timeout = min(timeout, max(0.0, next_deadline - time.monotonic()))
+        try:
+            self.wakeup.get(timeout=timeout)
+        except queue.Empty:
+            return
+        # 清空队列中积压的唤醒信号
+        while True:
+            try:
+                self.wakeup.get_nowait()
+            except queue.Empty:
+                break
+    
+    def _pop_due(self) -> List[str]:
+        """取出已过防抖期的文件"""
+        now = time.monotonic()
+        with self._lock:
+            due = [path for path, deadline in self.pending.items() if deadline <= now]
+            for path in due:
+                del self.pending[path]
+        return due
     
     def process_pending(self):
         """处理待处理的文件"""
-        for filepath in list(self.pending_files):
+        for filepath in self._pop_due():
             if not os.path.exists(filepath):
-                self.pending_files.discard(filepath)
+                continue
+            
+            if not self.state.has_file_changed(filepath):
                 continue
             
             print(f"\n{'='*50}")
@@ -544,6 +1233,7 @@ class PaperWatcherHandler(FileSystemEventHandler):
             
             try:
                 results = self.processor.process_file(filepath)
+                scanned = self.processor.scanned_content.pop(filepath, None)
                 
                 if results:
                     print(f"\n处理了 {len(results)} 篇新论文:")
@@ -552,15 +1242,64 @@ class PaperWatcherHandler(FileSystemEventHandler):
                         print(f"     {paper_info.to_markdown(pdf_path)}")
                     
                     # 询问是否更新文件
-                    self.processor.update_file_with_formatted_refs(filepath, results)
+                    current = self.processor.update_file_with_formatted_refs(filepath, results)
                 else:
                     print("  没有发现新的论文链接")
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        current = f.read()
                 
-                self.state.update_file_hash(filepath)
+                # 有链接处理失败时不记录hash，下次保存（即使内容相同）仍会重试；
+                # 处理期间文件又被修改时同样不记录，保证对应的事件不会被跳过
+                if filepath in self.processor.unresolved_files or current != scanned:
+                    self.state.forget_file_hash(filepath)
+                else:
+                    self.state.update_file_hash(filepath)
             except Exception as e:
                 print(f"  [错误] 处理文件失败: {e}")
-            
-            self.pending_files.discard(filepath)
+
+
+# 网络文件系统上inotify等原生事件不可靠，需要轮询
+NETWORK_FSTYPES = {"cifs", "nfs", "nfs4", "smbfs", "smb2"}
+
+
+def _is_network_fs(path: str) -> bool:
+    """判断路径是否位于网络文件系统（需要psutil，未安装时视为本地）"""
+    try:
+        import psutil
+    except ImportError:
+        return False
+    
+    path = os.path.abspath(path)
+    best_mount, best_fstype = "", ""
+    for part in psutil.disk_partitions(all=True):
+        mount = part.mountpoint
+        if path == mount or path.startswith(mount.rstrip(os.sep) + os.sep):
+            if len(mount) > len(best_mount):
+                best_mount, best_fstype = mount, part.fstype
+    return best_fstype.lower() in NETWORK_FSTYPES
+
+
+def pick_observer(path: str):
+    """根据平台和文件系统选择合适的Observer"""
+    system = platform.system()
+    
+    # Windows和网络文件系统使用轮询
+    if system == "Windows" or _is_network_fs(path):
+        from watchdog.observers.polling import PollingObserver
+        return PollingObserver(timeout=CONFIG["poll_interval"])
+    
+    try:
+        if system == "Linux":
+            from watchdog.observers.inotify import InotifyObserver
+            return InotifyObserver()
+        if system == "Darwin":
+            from watchdog.observers.fsevents import FSEventsObserver
+            return FSEventsObserver()
+    except ImportError:
+        pass
+    
+    from watchdog.observers import Observer
+    return Observer()
 
 
 # ==================== 主程序 ====================
@@ -594,6 +1333,7 @@ def main():
     watch_dir = os.path.abspath(args.watch)
     pdf_dir = args.pdf_dir or os.path.join(watch_dir, 'pdfs')
     state_file = os.path.join(watch_dir, '.paper_watcher_state.json')
+    cache_file = os.path.join(watch_dir, CONFIG["cache_file"])
     
     # 确保目录存在
     os.makedirs(watch_dir, exist_ok=True)
@@ -614,6 +1354,8 @@ def main():
 """)
     
     # 初始化组件
+    global METADATA_CACHE
+    METADATA_CACHE = MetadataCache(cache_file)
     state = StateManager(state_file)
     processor = MarkdownProcessor(state, pdf_dir)
     
@@ -627,13 +1369,19 @@ def main():
                 results = processor.process_file(filepath)
                 if results:
                     processor.update_file_with_formatted_refs(filepath, results)
+        state.maybe_flush(force=True)
         print("\n扫描完成！")
         return
     
     # 持续监控模式
     handler = PaperWatcherHandler(processor, state)
-    observer = Observer()
-    observer.schedule(handler, watch_dir, recursive=False)
+    try:
+        event_handler = handler.event_handler()
+    except ImportError:
+        print("请安装 watchdog: pip install watchdog")
+        exit(1)
+    observer = pick_observer(watch_dir)
+    observer.schedule(event_handler, watch_dir, recursive=False)
     observer.start()
     
     print("开始监控... (按 Ctrl+C 停止)")
@@ -641,10 +1389,12 @@ def main():
     
     try:
         while True:
-            time.sleep(1)
+            handler.wait_for_events(CONFIG["check_interval"])
             handler.process_pending()
+            state.maybe_flush()
     except KeyboardInterrupt:
         print("\n停止监控...")
+        state.maybe_flush(force=True)
         observer.stop()
     
     observer.join()